@@ -25,8 +25,7 @@ Table of Contents:
    - check_python_version
 
 4. Dependency Management
-   - install_dependency
-   - check_python_package
+   - install_dependencies
    - check_core_dependencies
    - verify_tool_installation
    - check_dependencies
@@ -51,11 +50,28 @@ Table of Contents:
 # ============================================================================
 
 import os
-import subprocess
-import platform
 import sys
+
+# Refuse non-root runs before paying for the remaining imports. --help and
+# --version only print and exit, so let anyone run those.
+if (__name__ == "__main__" and os.geteuid() != 0
+        and not {"-h", "--help", "--version"} & set(sys.argv[1:])):
+    sys.stderr.write("[-] Please run this script as root.\n")
+    sys.exit(1)
+
+import argparse
+import logging
+import subprocess
+import shlex
+import shutil
+import threading
+import time
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from functools import lru_cache, partial
 from datetime import datetime
+from typing import Callable, NamedTuple, Optional
 
 # Version information
 __version__ = "1.2.0"
@@ -63,6 +79,35 @@ __release_date__ = "2024-03-15"
 __author__ = "Claude 3.5 Sonnet"
 __license__ = "MIT"
 
+# apt-get update is skipped when the package lists are younger than APT_CACHE_TTL
+# seconds. Freshness is the newest mtime of our own stamp, the lists directory
+# and its partial/ download area (both change only when an update fetches lists,
+# unlike pkgcache.bin, which dpkg status changes also rebuild) and the stamp
+# that apt's periodic job touches after each successful unattended update.
+APT_UPDATE_STAMP = Path("/var/cache/ez-rta/apt-updated")
+APT_CACHE_FILES = (
+    APT_UPDATE_STAMP,
+    Path("/var/lib/apt/lists"),
+    Path("/var/lib/apt/lists/partial"),
+    Path("/var/lib/apt/periodic/update-success-stamp"),
+)
+APT_CACHE_TTL = 86400
+
+# Existing git checkouts are not pulled again if fetched within this many seconds
+REPO_REFRESH_TTL = 3600
+
+# Every tool is installed under this directory
+TOOLS_DIR = Path("/root/ez-rta-tools")
+
+# Host platform, read once since it cannot change while the script runs
+_UNAME = os.uname()
+_MACHINE = _UNAME.machine.lower()
+_SYSTEM = _UNAME.sysname.lower()
+
+# Release asset architecture for this machine, or None if it is not recognized
+_ARCH_NAMES = {"x86_64": "x86_64", "amd64": "x86_64", "aarch64": "arm64", "arm64": "arm64"}
+_ARCH = _ARCH_NAMES.get(_MACHINE, "arm" if "arm" in _MACHINE else None)
+
 # ============================================================================
 # 2. Utility Classes and Functions
 # ============================================================================
@@ -80,14 +125,45 @@ class Colors:
     UNDERLINE = '\033[4m'
     END = '\033[0m'
 
-def print_banner():
-    """Prints a colorful banner for the script."""
-    # Get current date and time
-    current_time = datetime.now().strftime("%A, %B %d, %Y at %H:%M:%S")
+# Only emit color codes on a terminal, and honor NO_COLOR (https://no-color.org).
+# Blanking the codes here turns every colored print in the script into plain text.
+_USE_COLOR = sys.stdout.isatty() and not os.environ.get("NO_COLOR")
+if not _USE_COLOR:
+    for _name in [name for name in vars(Colors) if name.isupper()]:
+        setattr(Colors, _name, "")
+
+@dataclass
+class Config:
+    """Decisions for a run, collected before any setup work starts.
     
-    banner = f"""
-{Colors.YELLOW}{Colors.BOLD}Current Time: {current_time}{Colors.END}
+    upgrade and install_missing are None until decided; skip_options holds
+    the keys of the main menu options to skip. tools lists the tools to
+    install, or None for all of them.
+    """
+    assume_yes: bool = False
+    upgrade: Optional[bool] = None
+    install_missing: Optional[bool] = None
+    skip_options: set = field(default_factory=set)
+    skip_python_check: bool = False
+    tools: Optional[list] = None
+    force_update: bool = False
+    force_refresh: bool = False
+    serial: bool = False
+
+def confirm(prompt, config=None):
+    """Asks a yes/no question, honoring --yes and non-interactive runs.
+    
+    Returns True without prompting when config.assume_yes is set, and False
+    when stdin is not a terminal so unattended runs never block on input().
+    """
+    if config is not None and config.assume_yes:
+        return True
+    if not sys.stdin.isatty():
+        return False
+    return input(f"{Colors.YELLOW}{prompt} (y/n): {Colors.END}").lower() == 'y'
 
+# Banner art, expanded once with the color codes chosen at import
+_BANNER_BODY = f"""
 {Colors.CYAN}{Colors.BOLD}  ______  ______       _____  _______        
  |  ____||___  /      |  __ \\|__   __| /\\    
  | |__      / /______ | |__) |  | |   /  \\   
@@ -97,84 +173,190 @@ def print_banner():
                                              
 {Colors.BLUE}{Colors.BOLD}[ Engagement Setup Automation Tool ]{Colors.END}
 {Colors.YELLOW}Version: {__version__} ({__release_date__}){Colors.END}
+
 """
-    print(banner)
+
+def print_banner():
+    """Prints a colorful banner for the script."""
+    # Only the timestamp changes between calls
+    sys.stdout.write(f"\n{Colors.YELLOW}{Colors.BOLD}Current Time: {datetime.now():%A, %B %d, %Y at %H:%M:%S}{Colors.END}\n{_BANNER_BODY}")
+
+# Log level, color and marker used for each print_status type
+_STATUS_STYLES = {
+    "success": (logging.INFO, Colors.GREEN, "[+]"),
+    "error": (logging.ERROR, Colors.RED, "[-]"),
+    "warning": (logging.WARNING, Colors.YELLOW, "[!]"),
+    "info": (logging.INFO, Colors.CYAN, "[*]"),
+}
+
+# Prefix for each status type, built once rather than on every message
+_STATUS_PREFIXES = {
+    status_type: f"{color}{marker} {Colors.WHITE}"
+    for status_type, (_, color, marker) in _STATUS_STYLES.items()
+}
+
+class StatusFormatter(logging.Formatter):
+    """Formats status records with their (possibly colored) marker."""
+    def format(self, record):
+        message = record.getMessage()
+        prefix = _STATUS_PREFIXES.get(getattr(record, "status_type", None))
+        if prefix is None:
+            return message
+        return prefix + message + Colors.END
+
+logger = logging.getLogger("ez-rta")
+_handler = logging.StreamHandler(sys.stdout)
+_handler.setFormatter(StatusFormatter())
+logger.addHandler(_handler)
+logger.setLevel(logging.INFO)
+logger.propagate = False
 
 def print_status(message, status_type="info"):
     """Standardized function for printing status messages."""
-    if status_type == "success":
-        print(f"{Colors.GREEN}[+] {Colors.WHITE}{message}{Colors.END}")
-    elif status_type == "error":
-        print(f"{Colors.RED}[-] {Colors.WHITE}{message}{Colors.END}")
-    elif status_type == "warning":
-        print(f"{Colors.YELLOW}[!] {Colors.WHITE}{message}{Colors.END}")
-    elif status_type == "info":
-        print(f"{Colors.CYAN}[*] {Colors.WHITE}{message}{Colors.END}")
-    else:
-        print(message)
+    level = _STATUS_STYLES.get(status_type, (logging.INFO,))[0]
+    # The handler's lock keeps lines from worker threads from interleaving
+    logger.log(level, "%s", message, extra={"status_type": status_type})
 
-def run_command(command, check=True):
-    """Runs a shell command and handles errors."""
+def run_command(argv, check=True, capture=False, env=None):
+    """Runs a command and handles errors.
+
+    Args:
+        argv (list): Program and arguments, executed directly without a shell.
+        check (bool): Treat a non-zero exit status as an error.
+        capture (bool): Capture stdout/stderr as text on the returned result.
+            Leave this off unless the caller inspects the output; uncaptured
+            output streams straight to the terminal.
+        env (dict, optional): Environment for the command. Defaults to ours.
+    """
     try:
-        result = subprocess.run(
-            command, 
-            shell=True, 
+        return subprocess.run(
+            argv, 
             check=check, 
-            stdout=subprocess.PIPE, 
-            stderr=subprocess.PIPE,
-            text=True  # Capture output as text for easier troubleshooting
+            capture_output=capture,
+            text=capture,
+            env=env
         )
-        print_status(f"Command executed: {command}", "success")
-        return result
     except subprocess.CalledProcessError as e:
-        print_status(f"Error running command: {command}\n{e}", "error")
-        print_status(f"Command output: {e.stdout}", "error") if e.stdout else None
-        print_status(f"Command error: {e.stderr}", "error") if e.stderr else None
+        # Only failures are reported here; callers announce their own success.
+        # Captured output goes into the same message so it stays in one piece.
+        message = f"Error running command: {shlex.join(argv)}\n{e}"
+        output = "".join(part for part in (e.stdout, e.stderr) if part).rstrip()
+        if output:
+            message += f"\n{output}"
+        print_status(message, "error")
+        return None
+    except FileNotFoundError:
+        print_status(f"Error running command: {shlex.join(argv)}\n{argv[0]} not found", "error")
         return None
 
-def install_dependency(name, install_command):
-    """Attempt to install a missing dependency."""
-    print_status(f"Attempting to install {name}...", "info")
-    result = run_command(install_command)
-    if result and result.returncode == 0:
-        print_status(f"Successfully installed {name}", "success")
-        return True
-    print_status(f"Failed to install {name}. Please install it manually.", "error")
-    return False
-
-def check_python_package(package):
-    """Check if a Python package is installed."""
+# Shared opener for every HTTP download, so all requests go out with the
+# same headers and future download helpers have one place to hook into.
+# Built on first use so runs that download nothing never import urllib.
+@lru_cache(maxsize=None)
+def _http_opener():
+    import urllib.request
+    opener = urllib.request.build_opener()
+    opener.addheaders = [("User-Agent", f"ez-rta/{__version__}")]
+    return opener
+
+def open_url(url, timeout=60):
+    """Opens a URL with the shared HTTP opener and returns the response."""
+    return _http_opener().open(url, timeout=timeout)
+
+@lru_cache(maxsize=None)
+def _ensure_dir(path):
+    """Creates a directory and its parents unless it already exists.
+    
+    The mkdir is attempted directly instead of after an exists() check, which
+    saves a stat and also covers another thread creating it in the meantime.
+    The cache makes repeat calls for the same path within a run free.
+    """
     try:
-        subprocess.run([sys.executable, "-c", f"import {package}"], 
-                      check=True, capture_output=True)
-        return True
-    except subprocess.CalledProcessError:
-        return False
+        path.mkdir(parents=True)
+    except FileExistsError:
+        pass
 
-def update_system():
-    """Update package lists and upgrade system packages."""
-    print_status("Updating system package lists...", "info")
+@lru_cache(maxsize=None)
+def _have_binary(name):
+    """Check whether an executable is on PATH, remembering the answer for the run."""
+    return shutil.which(name) is not None
+
+def install_dependencies(packages):
+    """Attempt to install missing dependencies with a single apt-get run.
     
-    # Update package lists
-    result = run_command("apt-get update")
-    if not result or result.returncode != 0:
-        print_status("Failed to update package lists", "error")
-        if input(f"{Colors.YELLOW}Continue anyway? (y/n): {Colors.END}").lower() != 'y':
-            sys.exit(1)
-        return False
+    Args:
+        packages (dict): Maps each missing binary name to the apt package providing it.
+    
+    Returns:
+        dict: Maps each binary name to True if it is available after the install.
+    """
+    print_status(f"Attempting to install {', '.join(packages)}...", "info")
+    run_command(["apt-get", "install", "-y"] + list(dict.fromkeys(packages.values())))
+    # Anything probed as missing before this install may be present now
+    _have_binary.cache_clear()
+    
+    # Re-check the same way check_core_dependencies probes
+    results = {name: _have_binary(name) for name in packages}
+    for name in packages:
+        if results[name]:
+            print_status(f"Successfully installed {name}", "success")
+        else:
+            print_status(f"Failed to install {name}. Please install it manually.", "error")
+    return results
+
+def apt_cache_age():
+    """Returns seconds since the apt package cache was last refreshed, or None if unknown."""
+    mtimes = []
+    for path in APT_CACHE_FILES:
+        try:
+            mtimes.append(path.stat().st_mtime)
+        except OSError:
+            continue
+    if not mtimes:
+        return None
+    return time.time() - max(mtimes)
+
+def update_system(config):
+    """Update package lists and upgrade system packages.
+    
+    Args:
+        config (Config): Run configuration; decides forced updates and upgrades.
+    """
+    age = apt_cache_age()
+    if not config.force_update and age is not None and age < APT_CACHE_TTL:
+        print_status(f"apt cache is fresh (age={int(age)}s), skipping apt-get update (use --force-update to override)", "info")
+    else:
+        print_status("Updating system package lists...", "info")
+        
+        # Update package lists
+        result = run_command(["apt-get", "update"])
+        if not result or result.returncode != 0:
+            print_status("Failed to update package lists", "error")
+            if not confirm("Continue anyway?", config):
+                sys.exit(1)
+            return False
+        
+        APT_UPDATE_STAMP.parent.mkdir(parents=True, exist_ok=True)
+        APT_UPDATE_STAMP.touch()
     
     print_status("Checking for system upgrades...", "info")
     
-    # Check for upgrades
-    upgrade_check = run_command("apt-get -s upgrade")
-    if upgrade_check and "0 upgraded, 0 newly installed" not in upgrade_check.stdout:
-        if input(f"{Colors.YELLOW}System updates are available. Would you like to upgrade? (y/n): {Colors.END}").lower() == 'y':
-            result = run_command("apt-get upgrade -y")
+    # Check for upgrades; listing upgradable packages only reads the package
+    # lists, unlike "apt-get -s upgrade" which runs the full resolver
+    # The "[upgradable from:" marker is translated, so ask apt for untranslated output
+    upgrade_check = run_command(["apt", "list", "--upgradable"], check=False, capture=True,
+                                env={**os.environ, "LC_ALL": "C"})
+    upgradable = [line for line in upgrade_check.stdout.splitlines() if "[upgradable from:" in line] if upgrade_check else []
+    if upgradable:
+        if not config.upgrade:
+            print_status(f"{len(upgradable)} system updates are available but upgrading was declined", "info")
+        else:
+            result = run_command(["apt-get", "upgrade", "-y"])
             if result and result.returncode == 0:
                 print_status("System upgrade completed successfully", "success")
             else:
                 print_status("System upgrade failed", "error")
-                if input(f"{Colors.YELLOW}Continue anyway? (y/n): {Colors.END}").lower() != 'y':
+                if not confirm("Continue anyway?", config):
                     sys.exit(1)
     else:
         print_status("System is up to date", "success")
@@ -195,90 +377,85 @@ def check_python_version():
         print_status(f"Python version {current_version[0]}.{current_version[1]} is below minimum required version {min_version[0]}.{min_version[1]}", "error")
         return False
 
-def verify_tool_installation(tool_name, check_command):
-    """Verify that a tool is properly installed and accessible."""
-    try:
-        result = subprocess.run(check_command, shell=True, check=True, 
-                              stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+def verify_tool_installation(tool_name, binary=None):
+    """Verify that a tool is properly installed and accessible on PATH.
+    
+    Args:
+        tool_name (str): Name of the tool shown in status messages.
+        binary (str, optional): Executable to look for. Defaults to tool_name.
+    """
+    if _have_binary(binary or tool_name):
         print_status(f"{tool_name} is properly installed and accessible", "success")
         return True
-    except subprocess.CalledProcessError:
-        print_status(f"{tool_name} is not properly installed or not accessible", "error")
-        return False
+    print_status(f"{tool_name} is not properly installed or not accessible", "error")
+    return False
 
-def check_core_dependencies():
+# Core system dependencies: binary name -> apt package that provides it
+_SYSTEM_DEPS = {
+    "wget": "wget",
+    "git": "git",
+    "curl": "curl",
+    "tmux": "tmux",
+    "zsh": "zsh",
+    # Moving Python dependencies to system deps since we're using apt
+    "pipx": "pipx",
+    "virtualenv": "python3-virtualenv"
+}
+
+def check_core_dependencies(config):
     """Check and attempt to install core dependencies."""
     # Check Python version
-    if not check_python_version():
-        if input(f"{Colors.YELLOW}Python version check failed. Continue anyway? (y/n): {Colors.END}").lower() != 'y':
+    if config.skip_python_check:
+        print_status("Skipping Python version check", "info")
+    elif not check_python_version():
+        if not confirm("Python version check failed. Continue anyway?", config):
             sys.exit(1)
     
     # Update system packages first
     print_status("Attempting to update system package lists...", "info")
-    update_system()
+    update_system(config)
     
     print_status("Checking core dependencies...", "info")
     
-    # Core system dependencies
-    system_deps = {
-        "wget": {"check": "wget --version", "install": "apt-get install -y wget"},
-        "git": {"check": "git --version", "install": "apt-get install -y git"},
-        "curl": {"check": "curl --version", "install": "apt-get install -y curl"},
-        "tmux": {"check": "tmux -V", "install": "apt-get install -y tmux"},
-        "zsh": {"check": "zsh --version", "install": "apt-get install -y zsh"},
-        # Moving Python dependencies to system deps since we're using apt
-        "pipx": {"check": "pipx --version", "install": "apt-get install -y pipx"},
-        "virtualenv": {"check": "virtualenv --version", "install": "apt-get install -y python3-virtualenv"}
-    }
-    
-    missing = []
-    
-    # Check system dependencies
-    for name, commands in system_deps.items():
-        try:
-            subprocess.run(commands["check"], shell=True, check=True, 
-                         stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    missing = {}
+
+    # Check system dependencies with a PATH lookup; no process is spawned
+    for name, package in _SYSTEM_DEPS.items():
+        if _have_binary(name):
             print_status(f"{name} is installed", "success")
-        except subprocess.CalledProcessError:
-            missing.append((name, commands["install"]))
+        else:
+            missing[name] = package
             print_status(f"{name} is not installed", "error")
     
     if missing:
         print_status("The following dependencies are missing:", "warning")
-        for name, _ in missing:
+        for name in missing:
             print(f"  - {name}")
         
-        if input(f"{Colors.YELLOW}Would you like to attempt automatic installation? (y/n): {Colors.END}").lower() == 'y':
-            for name, install_cmd in missing:
-                install_dependency(name, install_cmd)
+        if config.install_missing:
+            # Install everything in one apt run so dpkg locking, list parsing
+            # and triggers happen once rather than once per package
+            results = install_dependencies(missing)
+            failed = {name: missing[name] for name, ok in results.items() if not ok}
+            # apt aborts the whole transaction if one package cannot be
+            # installed, so give the rest a chance on their own
+            if len(failed) > 1:
+                print_status("Retrying failed packages individually...", "warning")
+                for name, package in failed.items():
+                    install_dependencies({name: package})
         else:
-            if input(f"{Colors.YELLOW}Continue without installing dependencies? (y/n): {Colors.END}").lower() != 'y':
+            if not confirm("Continue without installing dependencies?", config):
                 sys.exit(1)
 
-def check_dependencies():
+def check_dependencies(config):
     """Check if required dependencies are installed."""
-    check_core_dependencies()
+    check_core_dependencies(config)
 
-def setup_tmux():
-    """Creates a Tmux configuration file and installs tmux plugin manager."""
-    print_status("Setting up Tmux configuration...", "info")
-    
-    # Check if tmux is installed
-    try:
-        subprocess.run("tmux -V", shell=True, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    except subprocess.CalledProcessError:
-        print_status("Tmux is not installed. Please install it with: apt-get install tmux", "error")
-        return False
-    
-    # Create tmux logs directory
-    tmux_logs_path = Path("/root/tmux-logs")
-    tmux_logs_path.mkdir(parents=True, exist_ok=True)
-    
-    # Create tmux configuration
-    tmux_conf_path = Path.home() / ".tmux.conf"
-    tmux_conf_content = """
+# Contents of ~/.tmux.conf written by setup_tmux. Filled in with str.format,
+# so literal braces are doubled.
+_TMUX_CONF_TEMPLATE = """
 # Default Shell
-set-option -g default-shell /bin/zsh
+set-option -g default-shell {shell_path}
 
 # increase history size (Be careful making this too large)
 set -g history-limit 30000
@@ -306,7 +483,7 @@ set-window-option -g window-status-current-style fg=brightgreen,bg=colour237,bri
 set -g status-right-length 70
 set -g status-bg colour237
 set -g status-fg white
-set -g status-right "#[fg=white]Host: #[fg=green]#h#[fg=white] LAN: #[fg=green]#(ip addr show dev eth0 | grep "inet[^6]" | awk '{print $2}')#[fg=white] VPN: #[fg=green]#(ip addr show dev tun0 | grep "inet[^6]" | awk '{print $2}')"
+set -g status-right "#[fg=white]Host: #[fg=green]#h#[fg=white] LAN: #[fg=green]#(ip addr show dev eth0 | grep "inet[^6]" | awk '{{print $2}}')#[fg=white] VPN: #[fg=green]#(ip addr show dev tun0 | grep "inet[^6]" | awk '{{print $2}}')"
 
 # scroll with mouse
 setw -g mouse on
@@ -315,16 +492,44 @@ set -g terminal-overrides 'xterm*:smcup@:rmcup@'
 # Initialize TMUX plugin manager
 run '~/.tmux/plugins/tpm/tpm'
 """
-    with open(tmux_conf_path, "w") as f:
-        f.write(tmux_conf_content)
-    print_status(f"Tmux configuration saved at {tmux_conf_path}", "success")
+
+def setup_tmux():
+    """Creates a Tmux configuration file and installs tmux plugin manager."""
+    print_status("Setting up Tmux configuration...", "info")
+    
+    # Check if tmux is installed
+    if not _have_binary("tmux"):
+        print_status("Tmux is not installed. Please install it with: apt-get install tmux", "error")
+        return False
+    
+    # Create tmux logs directory
+    tmux_logs_path = Path("/root/tmux-logs")
+    _ensure_dir(tmux_logs_path)
+    
+    # Create tmux configuration
+    tmux_conf = _TMUX_CONF_TEMPLATE.format(shell_path=shutil.which("zsh") or "/bin/zsh")
+    tmux_conf_path = Path.home() / ".tmux.conf"
+    try:
+        current_conf = tmux_conf_path.read_text()
+    except (OSError, UnicodeDecodeError):
+        current_conf = None
+    if current_conf == tmux_conf:
+        # Leave the file (and its mtime) alone when there is nothing to change
+        print_status(f"Tmux configuration at {tmux_conf_path} is already up to date", "success")
+    else:
+        # Write to a temporary file and rename it over the old config so an
+        # interrupted run never leaves a half-written ~/.tmux.conf behind
+        tmp_conf_path = tmux_conf_path.with_suffix(".conf.tmp")
+        tmp_conf_path.write_text(tmux_conf)
+        os.replace(tmp_conf_path, tmux_conf_path)
+        print_status(f"Tmux configuration saved at {tmux_conf_path}", "success")
     print_status(f"Tmux logs will be saved to {tmux_logs_path}", "info")
     
     # Install Tmux Plugin Manager if not already installed
     tpm_path = Path.home() / ".tmux/plugins/tpm"
     if not tpm_path.exists():
         print_status("Installing Tmux Plugin Manager...", "info")
-        tpm_cmd = f"git clone https://github.com/tmux-plugins/tpm {tpm_path}"
+        tpm_cmd = ["git", "clone", "--depth=1", "--single-branch", "https://github.com/tmux-plugins/tpm", str(tpm_path)]
         result = run_command(tpm_cmd)
         if result and result.returncode == 0:
             print_status("Tmux Plugin Manager installed successfully", "success")
@@ -354,105 +559,141 @@ def create_engagement_dirs():
         'component': input(f"{Colors.YELLOW}Enter Component Name (e.g., TIPT, CIPT, CPPT): {Colors.END}"),
         'quarter': input(f"{Colors.YELLOW}Enter Quarter (e.g., Q1, Q2, Q3, Q4): {Colors.END}"),
         'initials': input(f"{Colors.YELLOW}Enter Initials (e.g., MB): {Colors.END}"),
-        'year': subprocess.run("date +%Y", shell=True, capture_output=True, text=True).stdout.strip()
+        'year': str(datetime.now().year)
     }
     
     engagement_dir = base_dir / f"{engagement_info['component']}-{engagement_info['quarter']}-{engagement_info['year']}-{engagement_info['initials']}"
     engagement_info['directory'] = str(engagement_dir)
     
     subdirs = ["nmap", "hosts", "nxc", "loot", "web"]
+    # Create the parent once; the leaves then need a single mkdir each
+    engagement_dir.mkdir(parents=True, exist_ok=True)
     for subdir in subdirs:
-        (engagement_dir / subdir).mkdir(parents=True, exist_ok=True)
+        try:
+            os.mkdir(engagement_dir / subdir)
+        except FileExistsError:
+            pass
     print_status(f"Engagement directory structure created at {engagement_dir}", "success")
     
     return engagement_info
 """
 
 def ensure_tools_dir():
-    """Ensures the tools directory exists at /root/ez-rta-tools."""
+    """Ensures the tools directory exists at TOOLS_DIR."""
     print_status("Ensuring tools directory exists...", "info")
-    tools_dir = Path("/root/ez-rta-tools")
-    tools_dir.mkdir(parents=True, exist_ok=True)
-    print_status(f"Tools directory ensured at {tools_dir}", "success")
-    return tools_dir
+    _ensure_dir(TOOLS_DIR)
+    print_status(f"Tools directory ensured at {TOOLS_DIR}", "success")
+    return TOOLS_DIR
 
-def install_pretender():
-    """Downloads and installs Pretender into a dedicated folder."""
+def install_pretender(force_refresh=False):
+    """Downloads and installs Pretender into a dedicated folder.
+    
+    Args:
+        force_refresh (bool): Download again even if the binary is already installed.
+    """
+    import tarfile
     version = "v1.3.2"  # Hardcoded stable version
+    tools_dir = TOOLS_DIR / "pretender"
+    pretender_bin = tools_dir / "pretender"
+    # The version is pinned, so an existing binary is already the one we would fetch
+    if not force_refresh and pretender_bin.exists():
+        print_status(f"Pretender is already installed in {tools_dir}, skipping download (use --force-refresh to override)", "success")
+        return True
+    
     print_status("Installing Pretender...", "info")
     print_status(f"Note: Installing stable version {version}. For newer versions, please visit: https://github.com/RedTeamPentesting/pretender/releases", "info")
     
-    tools_dir = Path("/root/ez-rta-tools/pretender")
-    tools_dir.mkdir(parents=True, exist_ok=True)
-    
-    # Detect system architecture and OS
-    machine = platform.machine().lower()
-    system = platform.system().lower()
+    if _SYSTEM != "linux":
+        print_status(f"Unsupported operating system: {_SYSTEM}. The pretender tool requires Linux.", "error")
+        return False
     
-    # Map architecture names
-    if machine in ["x86_64", "amd64"]:
-        arch = "x86_64"
-    elif machine in ["aarch64", "arm64"]:
-        arch = "arm64"
-    elif "arm" in machine:
-        arch = "arm"
-    else:
-        print_status(f"Unsupported architecture: {machine}. Defaulting to x86_64.", "warning")
+    arch = _ARCH
+    if arch is None:
+        print_status(f"Unsupported architecture: {_MACHINE}. Defaulting to x86_64.", "warning")
         arch = "x86_64"
     
-    if system != "linux":
-        print_status(f"Unsupported operating system: {system}. The pretender tool requires Linux.", "error")
-        return False
+    _ensure_dir(tools_dir)
     
     # Construct the download URL
     pretender_url = f"https://github.com/RedTeamPentesting/pretender/releases/download/{version}/pretender_Linux_{arch}.tar.gz"
     print_status(f"Download URL: {pretender_url}", "info")
     
-    pretender_tar = tools_dir / "pretender.tar.gz"
+    # Extract straight from the HTTP response; "r|gz" reads the archive
+    # sequentially, so the tarball never touches the disk
+    try:
+        with open_url(pretender_url) as response, \
+             tarfile.open(fileobj=response, mode="r|gz") as tar:
+            tar.extractall(tools_dir, filter="data")
+    except (OSError, tarfile.TarError) as e:
+        print_status(f"Failed to download Pretender: {e}", "error")
+        return False
     
-    # Download and extract
-    result = run_command(f"wget -O {pretender_tar} {pretender_url}")
-    if result and result.returncode == 0:
-        run_command(f"tar -xzf {pretender_tar} -C {tools_dir}")
-        pretender_tar.unlink()
-        run_command(f"chmod +x {tools_dir}/pretender")
-        
-        # Verify installation
-        if (tools_dir / "pretender").exists():
-            print_status(f"Pretender {version} successfully installed in {tools_dir}", "success")
-            print_status("To update to a newer version in the future, download it from: https://github.com/RedTeamPentesting/pretender/releases", "info")
-            return True
-        else:
-            print_status(f"Pretender executable not found after installation. Check for errors.", "error")
-            return False
-    else:
-        print_status("Failed to download Pretender", "error")
+    # Verify installation and add the execute bits in-process; the one stat
+    # both confirms the binary was extracted and supplies its current mode
+    try:
+        mode = pretender_bin.stat().st_mode
+    except FileNotFoundError:
+        print_status(f"Pretender executable not found after installation. Check for errors.", "error")
         return False
+    pretender_bin.chmod(mode | 0o111)
+    print_status(f"Pretender {version} successfully installed in {tools_dir}", "success")
+    print_status("To update to a newer version in the future, download it from: https://github.com/RedTeamPentesting/pretender/releases", "info")
+    return True
 
-def download_DC_Enum_Script():
-    """Downloads a DC Enumeration script from GitHub."""
+def _repo_is_fresh(path, ttl=REPO_REFRESH_TTL):
+    """Check whether a git checkout was fetched within the last ttl seconds."""
+    try:
+        age = time.time() - (path / ".git" / "FETCH_HEAD").stat().st_mtime
+    except OSError:
+        return False
+    return age < ttl
+
+def download_DC_Enum_Script(force_refresh=False):
+    """Downloads a DC Enumeration script from GitHub.
+    
+    Args:
+        force_refresh (bool): Pull an existing checkout even if it was fetched recently.
+    """
     print_status("Downloading DC Enumeration Script...", "info")
-    tools_dir = Path("/root/ez-rta-tools")
     repo_url = "https://github.com/mbb5546/dc-lookup.git"
-    repo_path = tools_dir / "dc-lookup"
+    repo_path = TOOLS_DIR / "dc-lookup"
     
     if repo_path.exists():
+        if not force_refresh and _repo_is_fresh(repo_path):
+            print_status("DC Lookup script was fetched recently, skipping pull (use --force-refresh to override)", "info")
+            return True
         print_status("DC Lookup script repository already exists. Pulling latest changes...", "warning")
-        result = run_command(f"git -C {repo_path} pull")
+        result = run_command(["git", "-C", str(repo_path), "pull"])
     else:
         print_status("Cloning DC Lookup script repository...", "info")
-        result = run_command(f"git clone {repo_url} {repo_path}")
+        result = run_command(["git", "clone", "--depth=1", "--single-branch", repo_url, str(repo_path)])
     
     if repo_path.exists():
         print_status(f"DC Lookup script downloaded to {repo_path}", "success")
+        return True
     else:
         print_status("Failed to download DC Lookup script", "error")
+        return False
+
+# On a fresh box, concurrent pipx installs race to create pipx's shared
+# libraries venv and its metadata, so pipx runs one install at a time while
+# the git and HTTP installers keep running alongside
+_PIPX_LOCK = threading.Lock()
+
+def _pipx_install(package):
+    """Runs pipx install for a package, waiting for any other pipx install to finish.
+    
+    Args:
+        package (str): Package name or pip requirement URL to install.
+    """
+    with _PIPX_LOCK:
+        return run_command(["pipx", "install", package])
 
 def install_impacket():
     """Install Impacket using pipx."""
     print_status("Installing Impacket...", "info")
     try:
-        result = run_command("pipx install impacket")
+        result = _pipx_install("impacket")
         if result and result.returncode == 0:
             print_status("Impacket installed successfully", "success")
             return True
@@ -467,14 +708,14 @@ def install_netexec():
     print_status("Installing NetExec...", "info")
     try:
         # Try pipx installation first
-        result = run_command("pipx install git+https://github.com/Pennyw0rth/NetExec")
+        result = _pipx_install("git+https://github.com/Pennyw0rth/NetExec")
         if result and result.returncode == 0:
             print_status("NetExec installed successfully via pipx", "success")
             return True
         
         # If pipx fails, try apt
         print_status("Pipx installation failed, attempting to install via apt...", "warning")
-        result = run_command("apt-get install -y netexec")
+        result = run_command(["apt-get", "install", "-y", "netexec"])
         if result and result.returncode == 0:
             print_status("NetExec installed successfully via apt", "success")
             return True
@@ -489,7 +730,7 @@ def install_powerview():
     """Install PowerView.py using pipx."""
     print_status("Installing PowerView.py...", "info")
     try:
-        result = run_command('pipx install "git+https://github.com/aniqfakhrul/powerview.py"')
+        result = _pipx_install("git+https://github.com/aniqfakhrul/powerview.py")
         if result and result.returncode == 0:
             print_status("PowerView.py installed successfully", "success")
             return True
@@ -499,88 +740,213 @@ def install_powerview():
         print_status(f"Error installing PowerView.py: {str(e)}", "error")
         return False
 
-def install_tools(selected_tools=None):
+class ToolSpec(NamedTuple):
+    """Installation details for a tool offered by install_tools."""
+    kind: str
+    install_func: Callable[..., bool]
+    description: str
+    # Whether install_func accepts force_refresh to update an existing copy
+    refreshable: bool = False
+
+# Available tools with their installation details
+_AVAILABLE_TOOLS = {
+    "pretender": ToolSpec(
+        "binary", install_pretender,
+        "LLMNR/NBT-NS/MDNS AND DHCPv6 Spoofing Tool (an alternative to Responder)",
+        refreshable=True
+    ),
+    "dc-lookup": ToolSpec(
+        "script", download_DC_Enum_Script,
+        "Helpful python script for DC enumeration",
+        refreshable=True
+    ),
+    "impacket": ToolSpec(
+        "python", install_impacket,
+        "Because how can we do pentesting without impacket?"
+    ),
+    "netexec": ToolSpec(
+        "python", install_netexec,
+        "Everyone's favorite tool)"
+    ),
+    "powerview": ToolSpec(
+        "python", install_powerview,
+        "A python port of PowerView.ps1 - comes in handy if you like the original PowerView.ps1"
+    ),
+}
+
+def install_tools(selected_tools=None, force_refresh=False, serial=False):
     """Central function to manage tool installation.
     
+    Tools are installed concurrently since each one spends most of its time
+    waiting on downloads and subprocesses; pipx installs are serialized among
+    themselves by _pipx_install.
+    
     Args:
         selected_tools (list, optional): List of tool names to install. If None, installs all tools.
+        force_refresh (bool): Refresh tools that are already present (Pretender, git checkouts).
+        serial (bool): Install one tool at a time, which keeps output readable when debugging.
+    
+    Returns:
+        bool: True if every selected tool was installed successfully.
     """
     print_status("Starting tool installation...", "info")
     
-    # Define available tools with their installation details
-    available_tools = {
-        "pretender": {
-            "type": "binary",
-            "install_func": install_pretender,
-            "description": "LLMNR/NBT-NS/MDNS AND DHCPv6 Spoofing Tool (an alternative to Responder)"
-        },
-        "dc-lookup": {
-            "type": "script",
-            "install_func": download_DC_Enum_Script,
-            "description": "Helpful python script for DC enumeration"
-        },
-        "impacket": {
-            "type": "python",
-            "install_func": install_impacket,
-            "description": "Because how can we do pentesting without impacket?"
-        },
-        "netexec": {
-            "type": "python",
-            "install_func": install_netexec,
-            "description": "Everyone's favorite tool)"
-        },
-        "powerview": {
-            "type": "python",
-            "install_func": install_powerview,
-            "description": "A python port of PowerView.ps1 - comes in handy if you like the original PowerView.ps1"
-        }
-    }
-    
     if selected_tools is None:
-        selected_tools = available_tools.keys()
+        selected_tools = _AVAILABLE_TOOLS.keys()
     
-    # Install selected tools
+    success = True
+    installers = {}
     for tool in selected_tools:
-        if tool not in available_tools:
+        spec = _AVAILABLE_TOOLS.get(tool)
+        if spec is None:
             print_status(f"Unknown tool: {tool}", "error")
+            success = False
             continue
-            
-        tool_info = available_tools[tool]
-        print_status(f"Installing {tool} ({tool_info['description']})...", "info")
+        installers[tool] = partial(spec.install_func, force_refresh=force_refresh) if spec.refreshable else spec.install_func
+        print_status(f"Installing {tool} ({spec.description})...", "info")
+    
+    if not installers:
+        return False
+    
+    # Install selected tools, one worker per tool since they mostly wait on I/O
+    with ThreadPoolExecutor(max_workers=1 if serial else len(installers)) as executor:
+        futures = {executor.submit(install_func): tool for tool, install_func in installers.items()}
+        for future in as_completed(futures):
+            tool = futures[future]
+            if future.result():
+                print_status(f"{tool} installation completed", "success")
+            else:
+                print_status(f"{tool} installation failed", "error")
+                success = False
+    
+    return success
+
+# Main menu options that can be skipped, with the flag that skips each one
+_SKIP_FLAGS = {
+    "1": "skip_tools_dir",
+    "2": "skip_tools",
+    "3": "skip_tmux",
+}
+
+def _tool_list(value):
+    """Parses the --tools value into a list of known tool names.
+    
+    Args:
+        value (str): Comma-separated tool names.
+    
+    Raises:
+        argparse.ArgumentTypeError: If no tool is named or a name is unknown.
+    """
+    tools = [tool.strip() for tool in value.split(",") if tool.strip()]
+    if not tools:
+        raise argparse.ArgumentTypeError("expected at least one tool name")
+    unknown = [tool for tool in tools if tool not in _AVAILABLE_TOOLS]
+    if unknown:
+        raise argparse.ArgumentTypeError(
+            f"unknown tool(s): {', '.join(unknown)} (choose from {', '.join(_AVAILABLE_TOOLS)})")
+    return tools
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Engagement Setup Automation Tool")
+    parser.add_argument("-y", "--yes", action="store_true",
+                        help="answer yes to every prompt and run without user input")
+    upgrade = parser.add_mutually_exclusive_group()
+    upgrade.add_argument("--upgrade", dest="upgrade", action="store_const", const=True,
+                         help="upgrade system packages if updates are available")
+    upgrade.add_argument("--skip-upgrade", dest="upgrade", action="store_const", const=False,
+                         help="never upgrade system packages")
+    parser.add_argument("--skip-python-check", action="store_true",
+                        help="do not check the Python version")
+    parser.add_argument("--tools", type=_tool_list,
+                        help="comma-separated list of tools to install, e.g. pretender,netexec (default: all)")
+    parser.add_argument("--skip-tools-dir", action="store_true",
+                        help=f"do not create the tools directory at {TOOLS_DIR}")
+    parser.add_argument("--skip-tools", action="store_true",
+                        help="do not install tools")
+    parser.add_argument("--skip-tmux", action="store_true",
+                        help="do not configure tmux")
+    parser.add_argument("--force-update", action="store_true",
+                        help="run apt-get update even if the package lists were refreshed recently")
+    parser.add_argument("--force-refresh", action="store_true",
+                        help="re-download Pretender and pull existing tool repositories even if they are recent")
+    parser.add_argument("--serial", action="store_true",
+                        help="run setup steps and tool installs one at a time (useful for debugging)")
+    parser.add_argument("--version", action="version", version=f"%(prog)s {__version__}")
+    return parser.parse_args()
+
+def collect_config(args, options):
+    """Builds the run configuration, asking once up front for anything not set by flags.
+    
+    Args:
+        args (argparse.Namespace): Parsed command line arguments.
+        options (dict): Main menu options, keyed by option number.
+    """
+    config = Config(
+        assume_yes=args.yes,
+        upgrade=args.upgrade,
+        skip_options={key for key, flag in _SKIP_FLAGS.items() if getattr(args, flag)},
+        skip_python_check=args.skip_python_check,
+        tools=args.tools,
+        force_update=args.force_update,
+        force_refresh=args.force_refresh,
+        serial=args.serial
+    )
+    
+    # Everything else is decided now so the setup itself never waits on input()
+    if config.upgrade is None:
+        config.upgrade = confirm("Upgrade system packages if updates are available?", config)
+    config.install_missing = confirm("Automatically install missing dependencies?", config)
+    
+    if not config.skip_options and not config.assume_yes and sys.stdin.isatty():
+        print(f"\n{Colors.YELLOW}{Colors.BOLD}Select which options you'd prefer to skip:{Colors.END}")
+        print(f"\n{Colors.CYAN}Available options:{Colors.END}")
+        for key, (desc, _) in options.items():
+            print(f"{Colors.BLUE}[{key}]{Colors.END} {desc}")
         
-        if tool_info["install_func"]():
-            print_status(f"{tool} installation completed", "success")
-        else:
-            print_status(f"{tool} installation failed", "error")
+        config.skip_options = set(input(f"\n{Colors.YELLOW}Enter the numbers of the options you want to skip, separated by spaces (or press Enter to run all): {Colors.END}").split())
+    
+    return config
 
 def main():
-    if os.geteuid() != 0:
-        print_status("Please run this script as root.", "error")
-        exit(1)
+    args = parse_args()
 
     print_banner()
     
-    # Check for dependencies early
-    check_dependencies()
-    
-    print(f"\n{Colors.YELLOW}{Colors.BOLD}Select which options you'd prefer to skip:{Colors.END}")
     options = {
-        "1": ("Create tools directory at /root/ez-rta-tools", ensure_tools_dir),
-        "2": ("Install tools", install_tools),
+        "1": (f"Create tools directory at {TOOLS_DIR}", ensure_tools_dir),
+        # Only called after collect_config below has assigned config
+        "2": ("Install tools", lambda: install_tools(config.tools, force_refresh=config.force_refresh, serial=config.serial)),
         "3": ("Configure Tmux Environment with ZSH as default shell", setup_tmux)
     }
-
-    print(f"\n{Colors.CYAN}Available options:{Colors.END}")
-    for key, (desc, _) in options.items():
-        print(f"{Colors.BLUE}[{key}]{Colors.END} {desc}")
+    config = collect_config(args, options)
     
-    skip_options = input(f"\n{Colors.YELLOW}Enter the numbers of the options you want to skip, separated by spaces (or press Enter to run all): {Colors.END}").split()
-
-    for key, (desc, func) in options.items():
-        if key not in skip_options:
-            func()
-
-    print(f"\n${Colors.GREEN}{Colors.BOLD}[+] Setup complete.${Colors.END}")
+    # Check for dependencies early
+    check_dependencies(config)
+
+    selected = {desc: func for key, (desc, func) in options.items() if key not in config.skip_options}
+
+    # The installers write into the tools directory, so create it up front
+    tools_dir_desc = options["1"][0]
+    if tools_dir_desc in selected:
+        selected.pop(tools_dir_desc)()
+
+    # The remaining options are independent and mostly wait on the network,
+    # so run them concurrently instead of one after another
+    failed = []
+    if selected:
+        with ThreadPoolExecutor(max_workers=1 if config.serial else len(selected)) as executor:
+            futures = {executor.submit(func): desc for desc, func in selected.items()}
+            for future in as_completed(futures):
+                if not future.result():
+                    failed.append(futures[future])
+
+    if failed:
+        print_status("Setup finished with errors in:", "warning")
+        for desc in failed:
+            print(f"  - {desc}")
+    else:
+        print(f"\n{Colors.GREEN}{Colors.BOLD}[+] Setup complete.{Colors.END}")
 
 if __name__ == "__main__":
     main()